@@ -7,65 +7,222 @@ Provides live plots of beam position and intensity, PID gain controls,
 and system status monitoring.
 """
 
+import importlib.util
+import itertools
 import json
+import queue
+import struct
 import sys
 import time
 import threading
 import traceback
 from collections import deque
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import numpy as np
 
 from PyQt6 import QtWidgets, QtCore, QtGui
 import pyqtgraph as pg
 import zmq
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional SIMD parser for JSON telemetry from publishers without binary frames
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+# Types a parsed JSON object can have
+JSON_OBJECT_TYPES = (dict, simdjson.Object) if simdjson is not None else (dict,)
+
+# Binary telemetry frame published by TelemetryPub::send_sample on the
+# "telemetry.bin" topic: t, pos, intensity, mag, loop_time_ms, flags
+TELEMETRY_STRUCT = struct.Struct('<dddddB')
+FLAG_DEADLINE_MISS = 0x01
+
+
+def json_loads(payload):
+    """Parse a JSON payload from bytes or a memoryview"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(bytes(payload))
+
+
+def json_dumps_pretty(data: Any) -> str:
+    """Serialize data as indented JSON text"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
+
+class NPRing:
+    """Fixed-capacity NumPy ring buffer of rows, overwriting the oldest
+    
+    view() returns the rows oldest-first: a plain slice until the ring has
+    wrapped, then a concatenation into a preallocated buffer.
+    """
+    
+    __slots__ = ('buf', 'head', 'count', 'cap', '_ordered')
+    
+    def __init__(self, cap: int, fields: int, dtype=np.float32):
+        self.buf = np.empty((cap, fields), dtype)
+        self.head = 0
+        self.count = 0
+        self.cap = cap
+        self._ordered = np.empty_like(self.buf)
+        
+    def __len__(self) -> int:
+        return self.count
+        
+    def extend(self, rows: np.ndarray):
+        """Append a block of rows"""
+        n = len(rows)
+        if n > self.cap:
+            # Only the newest cap rows can be kept
+            rows = rows[-self.cap:]
+            n = self.cap
+        idx = (self.head + np.arange(n)) % self.cap
+        self.buf[idx] = rows
+        self.head = (self.head + n) % self.cap
+        self.count = min(self.count + n, self.cap)
+        
+    def view(self) -> np.ndarray:
+        """Return the stored rows oldest-first"""
+        if self.count < self.cap:
+            return self.buf[:self.count]
+        if self.head == 0:
+            return self.buf
+        h = self.head
+        return np.concatenate((self.buf[h:], self.buf[:h]), out=self._ordered)
+        
+    def clear(self):
+        """Discard all stored rows"""
+        self.head = 0
+        self.count = 0
+
 
 class TelemetryThread(QtCore.QThread):
-    """Background thread for receiving telemetry data via ZeroMQ"""
+    """Background thread for receiving telemetry data via ZeroMQ
+    
+    Telemetry samples are written into a fixed-size single-producer/
+    single-consumer ring that the GUI thread drains, so no Qt signal is
+    emitted per sample. Low-rate alarm/error/status messages are queued
+    separately as raw (topic, payload) pairs. data_ready fires at most once
+    per drain by the consumer to tell it there is something to read.
+    """
+    
+    # Ring columns: t, pos, intensity, mag, loop_time_ms, deadline_miss
+    RING_FIELDS = 6
     
-    data_received = QtCore.pyqtSignal(dict)
+    data_ready = QtCore.pyqtSignal()
     error_occurred = QtCore.pyqtSignal(str)
     
-    def __init__(self, telemetry_address: str = "tcp://127.0.0.1:5556"):
+    def __init__(self, telemetry_address: str = "tcp://127.0.0.1:5556", max_batch: int = 64,
+                 rcvhwm: int = 100000, rcvbuf: int = 4 * 1024 * 1024, conflate_status: bool = True,
+                 status_rcvhwm: int = 8, ring_size: int = 8192):
         super().__init__()
         self.telemetry_address = telemetry_address
+        self.max_batch = max_batch
+        self.rcvhwm = rcvhwm
+        self.rcvbuf = rcvbuf
+        self.conflate_status = conflate_status
+        self.status_rcvhwm = status_rcvhwm
         self.running = True
         self.context = None
         self.subscriber = None
+        self.status_subscriber = None
+        self.poller = None
+        
+        # inproc PAIR used by stop() to wake the poll loop immediately
+        self._stop_address = f"inproc://telemetry-stop-{id(self):x}"
+        self._stop_socket = None
+        
+        # SPSC sample ring; _w and _r are monotonically increasing sample indices
+        self.ring_size = ring_size
+        self._ring = np.empty((ring_size, self.RING_FIELDS), np.float64)
+        self._w = 0
+        self._r = 0
+        self._w_pending = 0
+        self._index_lock = threading.Lock()
+        self.dropped_samples = 0
+        
+        # Set by the consumer before it drains, cleared when data_ready is emitted
+        self._notify = True
+        
+        # Non-telemetry messages for the GUI thread
+        self._events = deque()
+        
+        # Topics handled on this thread; everything else is queued as an event
+        self._dispatch: Dict[bytes, Callable[[memoryview], None]] = {
+            b"telemetry.bin": self._push_binary_sample,
+            b"telemetry": self._push_json_sample,
+        }
+        
+        # simdjson parsers are not thread-safe; this one is only used on the thread
+        self._json_parser = simdjson.Parser() if simdjson is not None else None
         
     def run(self):
         """Main thread loop for receiving telemetry"""
         try:
-            self.context = zmq.Context()
+            self.context = zmq.Context.instance()
+            
+            # Main stream: deep queue so plot history is not silently dropped
             self.subscriber = self.context.socket(zmq.SUB)
+            self.subscriber.setsockopt(zmq.RCVHWM, self.rcvhwm)
+            self.subscriber.setsockopt(zmq.RCVBUF, self.rcvbuf)
             self.subscriber.connect(self.telemetry_address)
             self.subscriber.setsockopt(zmq.SUBSCRIBE, b"telemetry")
             self.subscriber.setsockopt(zmq.SUBSCRIBE, b"alarm")
             self.subscriber.setsockopt(zmq.SUBSCRIBE, b"error")
-            self.subscriber.setsockopt(zmq.SUBSCRIBE, b"status")
             
-            # Set receive timeout to allow clean shutdown
-            self.subscriber.setsockopt(zmq.RCVTIMEO, 1000)  # 1 second timeout
+            # Status stream: only the freshest message matters, so keep the libzmq
+            # queue tiny and forward only the newest message of each drain.
+            # Nothing in the console consumes status messages yet; they are
+            # dropped by BeamlineConsole._dispatch.
+            self.status_subscriber = self.context.socket(zmq.SUB)
+            self.status_subscriber.setsockopt(zmq.RCVHWM, self.status_rcvhwm)
+            self.status_subscriber.connect(self.telemetry_address)
+            self.status_subscriber.setsockopt(zmq.SUBSCRIBE, b"status")
+            
+            self._stop_socket = self.context.socket(zmq.PAIR)
+            self._stop_socket.bind(self._stop_address)
+            
+            self.poller = zmq.Poller()
+            self.poller.register(self.subscriber, zmq.POLLIN)
+            self.poller.register(self.status_subscriber, zmq.POLLIN)
+            self.poller.register(self._stop_socket, zmq.POLLIN)
             
             while self.running:
                 try:
-                    # Receive topic and payload
-                    topic = self.subscriber.recv_string(zmq.DONTWAIT)
-                    payload = self.subscriber.recv_string(zmq.DONTWAIT)
+                    # Sleep until data arrives or stop() wakes us (timeout is a fallback)
+                    ready = dict(self.poller.poll(100))
+                    if self._stop_socket in ready:
+                        break
+                        
+                    # Drain up to max_batch pending messages from each ready socket
+                    events = []
+                    received = 0
+                    if self.subscriber in ready:
+                        received += self._drain(self.subscriber, events)
+                        
+                    if self.status_subscriber in ready:
+                        status = []
+                        received += self._drain(self.status_subscriber, status)
+                        if self.conflate_status:
+                            status = status[-1:]
+                        events.extend(status)
                     
-                    # Parse JSON payload
-                    data = json.loads(payload)
-                    data['_topic'] = topic
+                    # Make the whole batch visible to the GUI thread at once
+                    self._events.extend(events)
+                    self._publish_samples()
                     
-                    # Emit signal with data
-                    self.data_received.emit(data)
-                    
-                except zmq.Again:
-                    # Timeout - continue loop
-                    continue
-                except json.JSONDecodeError as e:
-                    self.error_occurred.emit(f"JSON decode error: {e}")
+                    if received and self._notify:
+                        self._notify = False
+                        self.data_ready.emit()
+                        
                 except Exception as e:
                     self.error_occurred.emit(f"Telemetry error: {e}")
                     
@@ -73,44 +230,218 @@ class TelemetryThread(QtCore.QThread):
             self.error_occurred.emit(f"Failed to setup telemetry: {e}")
         finally:
             self.cleanup()
+            
+    def _drain(self, socket: zmq.Socket, events: List[Tuple[bytes, bytes]]) -> int:
+        """Read up to max_batch pending messages from socket without blocking
+        
+        Topics in the dispatch table are handled here, anything else is
+        appended to events. Returns the number of messages read.
+        """
+        received = 0
+        while received < self.max_batch and socket.get(zmq.EVENTS) & zmq.POLLIN:
+            topic = socket.recv()
+            payload = socket.recv(copy=False)
+            received += 1
+            
+            handler = self._dispatch.get(topic)
+            if handler:
+                # A bad packet must not take the rest of the batch with it
+                try:
+                    handler(payload.buffer)
+                except Exception as e:
+                    self.error_occurred.emit(f"Telemetry error: {e}")
+            else:
+                events.append((topic, payload.bytes))
+        return received
+        
+    def _push_binary_sample(self, payload: memoryview):
+        """Unpack one binary telemetry frame into the ring (producer side)"""
+        if len(payload) != TELEMETRY_STRUCT.size:
+            self.error_occurred.emit(
+                f"Binary telemetry frame is {len(payload)} bytes, expected {TELEMETRY_STRUCT.size}")
+            return
+        t, pos, intensity, mag, loop_time, flags = TELEMETRY_STRUCT.unpack_from(payload)
+        self._push_sample(t, pos, intensity, mag, loop_time, flags & FLAG_DEADLINE_MISS)
+        
+    def _push_json_sample(self, payload: memoryview):
+        """Parse one JSON telemetry message (older publishers) into the ring"""
+        try:
+            sample = self._parse_json_sample(payload)
+        except (ValueError, TypeError) as e:
+            self.error_occurred.emit(f"JSON decode error: {e}")
+            return
+        self._push_sample(*sample)
+        
+    def _push_sample(self, t: float, pos: float, intensity: float, mag: float,
+                     loop_time: float, deadline_miss: int):
+        """Write one telemetry sample into the ring (producer side)"""
+        w = self._w_pending
+        if w - self._r >= self.ring_size:
+            # Consumer has fallen a full ring behind - drop the newest sample
+            self.dropped_samples += 1
+            return
+        self._ring[w % self.ring_size] = (t, pos, intensity, mag, loop_time, deadline_miss)
+        self._w_pending = w + 1
+        
+    def _parse_json_sample(self, payload: memoryview) -> Tuple[float, float, float, float, float, int]:
+        """Extract the telemetry scalars from a JSON payload"""
+        if self._json_parser is not None:
+            data = self._json_parser.parse(payload)
+        else:
+            data = json_loads(payload)
+        try:
+            if not isinstance(data, JSON_OBJECT_TYPES):
+                raise ValueError(f"telemetry payload is a JSON {type(data).__name__}, not an object")
+            return (float(data.get('t', 0)), float(data.get('pos', 0)), float(data.get('intensity', 0)),
+                    float(data.get('mag', 0)), float(data.get('loop_time_ms', 0)),
+                    int(data.get('deadline_miss', 0)))
+        finally:
+            # A simdjson document must be released before its parser is reused
+            del data
+            
+    def _publish_samples(self):
+        """Publish the producer write index to the consumer"""
+        if self._w_pending != self._w:
+            with self._index_lock:
+                self._w = self._w_pending
+                
+    def pop_samples(self) -> np.ndarray:
+        """Return all published, unread samples as an (n, RING_FIELDS) array (consumer side)"""
+        # Re-arm before reading so anything published afterwards signals again
+        self._notify = True
+        with self._index_lock:
+            w = self._w
+        r = self._r
+        if w == r:
+            return self._ring[:0]
+        samples = self._ring[np.arange(r, w) % self.ring_size]
+        with self._index_lock:
+            self._r = w
+        return samples
+        
+    def pop_events(self) -> List[Tuple[bytes, bytes]]:
+        """Return all queued non-telemetry messages (consumer side)"""
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
     
     def stop(self):
         """Stop the telemetry thread"""
         self.running = False
         
+        # Wake the poll loop now instead of waiting for its timeout
+        if self.context is not None:
+            try:
+                waker = self.context.socket(zmq.PAIR)
+                waker.setsockopt(zmq.LINGER, 0)
+                waker.connect(self._stop_address)
+                waker.send(b"", zmq.NOBLOCK)
+                waker.close()
+            except zmq.ZMQError:
+                pass
+        
     def cleanup(self):
         """Clean up ZeroMQ resources"""
         if self.subscriber:
             self.subscriber.close()
-        if self.context:
-            self.context.term()
+        if self.status_subscriber:
+            self.status_subscriber.close()
+        if self._stop_socket:
+            self._stop_socket.close()
 
 
 class ControlClient:
     """ZeroMQ client for sending control commands"""
     
-    def __init__(self, control_address: str = "tcp://127.0.0.1:5555"):
+    def __init__(self, control_address: str = "tcp://127.0.0.1:5555", timeout_ms: int = 200):
         self.control_address = control_address
-        self.context = zmq.Context()
+        self.timeout_ms = timeout_ms
+        self.context = zmq.Context.instance()
         self.requester = self.context.socket(zmq.REQ)
+        # Relaxed + correlated REQ: a lost reply no longer locks the socket,
+        # and late replies to abandoned requests are discarded by libzmq
+        self.requester.setsockopt(zmq.REQ_RELAXED, 1)
+        self.requester.setsockopt(zmq.REQ_CORRELATE, 1)
+        self.requester.setsockopt(zmq.LINGER, 0)
         self.requester.connect(control_address)
-        self.requester.setsockopt(zmq.RCVTIMEO, 5000)  # 5 second timeout
+        self.poller = zmq.Poller()
+        self.poller.register(self.requester, zmq.POLLIN)
         
     def send_command(self, command: Dict[str, Any]) -> Dict[str, Any]:
         """Send command and return response"""
         try:
             self.requester.send_string(json.dumps(command))
-            response_str = self.requester.recv_string()
-            return json.loads(response_str)
-        except zmq.Again:
-            return {"ok": False, "error": "Command timeout"}
+            if not self.poller.poll(self.timeout_ms):
+                return {"ok": False, "error": "Command timeout"}
+            return json_loads(self.requester.recv())
         except Exception as e:
             return {"ok": False, "error": str(e)}
     
     def close(self):
         """Close the control client"""
         self.requester.close()
-        self.context.term()
+
+
+class ControlThread(QtCore.QThread):
+    """Background thread that owns the control socket
+    
+    Commands are queued from the GUI thread and answered through
+    response_received, so the GUI never blocks on a control round-trip.
+    Urgent requests (emergency stop) jump ahead of everything pending,
+    including the remaining commands of a batch already being sent.
+    """
+    
+    # Queue priorities (lower is sent first)
+    URGENT = 0
+    NORMAL = 1
+    _STOP = 2
+    
+    response_received = QtCore.pyqtSignal(str, list, list)
+    
+    def __init__(self, control_address: str = "tcp://127.0.0.1:5555", timeout_ms: int = 200):
+        super().__init__()
+        self.control_address = control_address
+        self.timeout_ms = timeout_ms
+        # Entries are (priority, seq, tag, commands); seq keeps FIFO order per priority
+        self.requests = queue.PriorityQueue()
+        self._seq = itertools.count()
+        
+    def request(self, tag: str, *commands: Dict[str, Any], urgent: bool = False):
+        """Queue commands to be sent in order; responses are emitted under tag"""
+        priority = self.URGENT if urgent else self.NORMAL
+        self.requests.put((priority, next(self._seq), tag, list(commands)))
+        
+    def run(self):
+        """Main thread loop for sending queued commands"""
+        client = ControlClient(self.control_address, self.timeout_ms)
+        try:
+            while True:
+                priority, _, tag, commands = self.requests.get()
+                if priority == self._STOP:
+                    break
+                responses = []
+                for command in commands:
+                    if priority != self.URGENT:
+                        self._send_urgent(client)
+                    responses.append(client.send_command(command))
+                self.response_received.emit(tag, commands, responses)
+        finally:
+            client.close()
+            
+    def _send_urgent(self, client: ControlClient):
+        """Send any urgent requests queued while a batch is in progress"""
+        while True:
+            with self.requests.mutex:
+                if not self.requests.queue or self.requests.queue[0][0] != self.URGENT:
+                    return
+            _, _, tag, commands = self.requests.get_nowait()
+            responses = [client.send_command(command) for command in commands]
+            self.response_received.emit(tag, commands, responses)
+            
+    def stop(self):
+        """Stop the control thread once queued commands are sent"""
+        self.requests.put((self._STOP, next(self._seq), None, None))
 
 
 class BeamlineConsole(QtWidgets.QMainWindow):
@@ -121,36 +452,67 @@ class BeamlineConsole(QtWidgets.QMainWindow):
         self.setWindowTitle("Beamline Operator Console")
         self.setWindowIcon(QtGui.QIcon())
         
-        # Data storage
+        # Data storage: preallocated ring buffers filled in lockstep.
+        # Timestamps stay float64; float32 loses millisecond steps after a
+        # couple of hours. Columns: pos, intensity, mag, loop_time_ms
+        # (float32 is plenty for plotting)
         self.max_points = 2000
-        self.time_data = deque(maxlen=self.max_points)
-        self.position_data = deque(maxlen=self.max_points)
-        self.intensity_data = deque(maxlen=self.max_points)
-        self.magnet_data = deque(maxlen=self.max_points)
-        self.loop_time_data = deque(maxlen=self.max_points)
+        self._times = NPRing(self.max_points, 1, np.float64)
+        self._history = NPRing(self.max_points, 4)
+        
+        # Plot x values, rebased to the oldest visible sample in float64. Only
+        # the offsets are float32, so resolution depends on the window span
+        # rather than uptime: below 1 us for the 2 s window at 1 kHz
+        self._plot_t = np.empty(self.max_points, np.float32)
+        
+        # Monotonic sample counter, used to skip redraws when nothing arrived
+        self._samples_seen = 0
+        self._last_plotted_count = -1
+        
+        # Last setpoint drawn on the position plot
+        self._last_sp: Optional[float] = None
+        
+        # Last emergency stop state applied to the buttons
+        self._estop_state: Optional[bool] = None
         
         # Status tracking
         self.last_telemetry_time = 0
         self.total_deadline_misses = 0
         self.connection_status = "Disconnected"
         
+        # One ZeroMQ context (and IO thread) shared by every socket in the console;
+        # terminated in closeEvent once all sockets are closed
+        zmq_context = zmq.Context.instance(io_threads=1)
+        zmq_context.setsockopt(zmq.LINGER, 0)
+        
         # Initialize components
-        self.control_client = ControlClient()
+        self.control_thread = ControlThread()
         self.telemetry_thread = TelemetryThread()
+        self._status_pending = False
+        self._plot_pending = False
+        self.plot_interval_ms = 33
+        self._dispatch: Dict[bytes, Callable[[bytes], None]] = {
+            b"alarm": self._handle_alarm,
+            b"error": self._handle_error,
+        }
+        self._control_handlers = {
+            "status": self._on_status_response,
+            "apply": self._on_apply_response,
+            "recommission": self._on_recommission_response,
+            "emergency_stop": self._on_emergency_stop_response,
+            "toggle_control": self._on_toggle_control_response,
+        }
         
         # Setup UI
         self.setup_ui()
         self.setup_plots()
         self.setup_telemetry()
         
-        # Start telemetry reception
+        # Start telemetry reception and control I/O
+        self.control_thread.response_received.connect(self.handle_control_response)
+        self.control_thread.start()
         self.telemetry_thread.start()
         
-        # Setup periodic updates
-        self.update_timer = QtCore.QTimer()
-        self.update_timer.timeout.connect(self.update_plots)
-        self.update_timer.start(50)  # 20 Hz update rate
-        
         # Setup status update timer
         self.status_timer = QtCore.QTimer()
         self.status_timer.timeout.connect(self.update_status)
@@ -267,7 +629,7 @@ class BeamlineConsole(QtWidgets.QMainWindow):
         self.pos_plot.setLabel('left', 'Position', 'mm')
         self.pos_plot.setLabel('bottom', 'Time', 's')
         self.pos_plot.showGrid(x=True, y=True)
-        self.pos_curve = self.pos_plot.plot(pen=pg.mkPen(color='blue', width=2), symbol='o', symbolSize=3)
+        self.pos_curve = self.pos_plot.plot(pen=pg.mkPen(color='blue', width=1))
         self.setpoint_line = pg.InfiniteLine(pos=0, angle=0, pen=pg.mkPen(color='red', style=QtCore.Qt.PenStyle.DashLine))
         self.pos_plot.addItem(self.setpoint_line)
         
@@ -276,85 +638,121 @@ class BeamlineConsole(QtWidgets.QMainWindow):
         self.intensity_plot.setLabel('left', 'Intensity', 'counts')
         self.intensity_plot.setLabel('bottom', 'Time', 's')
         self.intensity_plot.showGrid(x=True, y=True)
-        self.intensity_curve = self.intensity_plot.plot(pen=pg.mkPen(color='green', width=2))
+        self.intensity_curve = self.intensity_plot.plot(pen=pg.mkPen(color='green', width=1))
         
         # Magnet current plot
         self.magnet_plot = self.plot_widget.addPlot(title="Magnet Current", row=1, col=0)
         self.magnet_plot.setLabel('left', 'Current', 'A')
         self.magnet_plot.setLabel('bottom', 'Time', 's')
         self.magnet_plot.showGrid(x=True, y=True)
-        self.magnet_curve = self.magnet_plot.plot(pen=pg.mkPen(color='orange', width=2))
+        self.magnet_curve = self.magnet_plot.plot(pen=pg.mkPen(color='orange', width=1))
         
         # Loop performance plot
         self.perf_plot = self.plot_widget.addPlot(title="Loop Performance", row=1, col=1)
         self.perf_plot.setLabel('left', 'Loop Time', 'ms')
         self.perf_plot.setLabel('bottom', 'Time', 's')
         self.perf_plot.showGrid(x=True, y=True)
-        self.perf_curve = self.perf_plot.plot(pen=pg.mkPen(color='purple', width=2))
+        self.perf_curve = self.perf_plot.plot(pen=pg.mkPen(color='purple', width=1))
+        
+        # Let pyqtgraph decimate to the visible pixel width instead of
+        # drawing every buffered sample
+        for curve in (self.pos_curve, self.intensity_curve, self.magnet_curve, self.perf_curve):
+            curve.setDownsampling(auto=True, method='peak')
+            curve.setClipToView(True)
         
     def setup_telemetry(self):
         """Setup telemetry reception"""
-        self.telemetry_thread.data_received.connect(self.handle_telemetry_data)
+        self.telemetry_thread.data_ready.connect(self.schedule_plot)
         self.telemetry_thread.error_occurred.connect(self.handle_telemetry_error)
+        self.setpoint_spin.valueChanged.connect(self.schedule_plot)
         
-    def handle_telemetry_data(self, data: Dict[str, Any]):
-        """Handle incoming telemetry data"""
-        try:
-            topic = data.get('_topic', 'telemetry')
-            
-            if topic == 'telemetry':
-                # Main telemetry data
-                t = data.get('t', 0)
-                pos = data.get('pos', 0)
-                intensity = data.get('intensity', 0)
-                mag_current = data.get('mag', 0)
-                loop_time = data.get('loop_time_ms', 0)
-                deadline_miss = data.get('deadline_miss', 0)
-                
-                # Store data
-                self.time_data.append(t)
-                self.position_data.append(pos)
-                self.intensity_data.append(intensity)
-                self.magnet_data.append(mag_current)
-                self.loop_time_data.append(loop_time)
-                
-                # Update status
-                self.last_telemetry_time = time.time()
-                self.connection_status = "Connected"
-                
-                if deadline_miss:
-                    self.total_deadline_misses += 1
+    def poll_telemetry(self):
+        """Pull pending samples and messages from the telemetry thread"""
+        samples = self.telemetry_thread.pop_samples()
+        if len(samples):
+            self.append_samples(samples)
+            
+        events = self.telemetry_thread.pop_events()
+        if events:
+            self.handle_telemetry_batch(events)
+            
+    def append_samples(self, samples: np.ndarray):
+        """Append a block of telemetry samples to the plot ring buffer"""
+        # Update status
+        self.last_telemetry_time = time.time()
+        self.connection_status = "Connected"
+        self.total_deadline_misses += int(np.count_nonzero(samples[:, 5]))
+        
+        # Store data
+        self._times.extend(samples[:, :1])
+        self._history.extend(samples[:, 1:5])
+        self._samples_seen += len(samples)
+        
+    def handle_telemetry_batch(self, batch: List[Tuple[bytes, bytes]]):
+        """Handle a batch of incoming non-telemetry messages"""
+        for topic, payload in batch:
+            handler = self._dispatch.get(topic)
+            if handler:
+                try:
+                    handler(payload)
+                except Exception as e:
+                    print(f"Error handling telemetry data: {e}")
                     
-            elif topic == 'alarm':
-                # Handle alarm messages
-                alarm_type = data.get('type', 'unknown')
-                self.show_alarm(f"ALARM: {alarm_type}", data)
-                
-            elif topic == 'error':
-                # Handle error messages
-                error_msg = data.get('error', 'Unknown error')
-                self.show_error(f"ERROR: {error_msg}")
-                
-        except Exception as e:
-            print(f"Error handling telemetry data: {e}")
+    def _handle_alarm(self, payload: bytes):
+        """Handle alarm messages"""
+        data = json_loads(payload)
+        alarm_type = data.get('type', 'unknown')
+        self.show_alarm(f"ALARM: {alarm_type}", data)
+        
+    def _handle_error(self, payload: bytes):
+        """Handle error messages"""
+        data = json_loads(payload)
+        error_msg = data.get('error', 'Unknown error')
+        self.show_error(f"ERROR: {error_msg}")
             
+    @QtCore.pyqtSlot(str)
     def handle_telemetry_error(self, error_msg: str):
         """Handle telemetry errors"""
         print(f"Telemetry error: {error_msg}")
         self.connection_status = "Error"
         
+    def clear_data(self):
+        """Discard all buffered telemetry samples"""
+        self._times.clear()
+        self._history.clear()
+        
+    @QtCore.pyqtSlot()
+    def schedule_plot(self):
+        """Schedule a plot update, at most one per plot_interval_ms"""
+        if not self._plot_pending:
+            self._plot_pending = True
+            QtCore.QTimer.singleShot(self.plot_interval_ms, self.update_plots)
+            
+    @QtCore.pyqtSlot()
     def update_plots(self):
         """Update all plots with latest data"""
-        if not self.time_data:
+        self._plot_pending = False
+        self.poll_telemetry()
+        
+        # Update setpoint line only when it moved
+        sp = self.setpoint_spin.value()
+        if sp != self._last_sp:
+            self.setpoint_line.setPos(sp)
+            self._last_sp = sp
+            
+        # Skip the redraw if no new samples arrived since the last one
+        if not self._history or self._samples_seen == self._last_plotted_count:
             return
             
         try:
-            # Convert to numpy arrays for plotting
-            times = np.array(self.time_data)
-            positions = np.array(self.position_data)
-            intensities = np.array(self.intensity_data)
-            magnet_currents = np.array(self.magnet_data)
-            loop_times = np.array(self.loop_time_data)
+            # Time-ordered view into the ring buffer, one column per channel
+            t = self._times.view()[:, 0]
+            data = self._history.view()
+            times = np.subtract(t, t[0], out=self._plot_t[:len(t)])
+            positions = data[:, 0]
+            intensities = data[:, 1]
+            magnet_currents = data[:, 2]
+            loop_times = data[:, 3]
             
             # Update curves
             self.pos_curve.setData(times, positions)
@@ -362,22 +760,37 @@ class BeamlineConsole(QtWidgets.QMainWindow):
             self.magnet_curve.setData(times, magnet_currents)
             self.perf_curve.setData(times, loop_times)
             
-            # Update setpoint line
-            self.setpoint_line.setPos(self.setpoint_spin.value())
+            self._last_plotted_count = self._samples_seen
             
         except Exception as e:
             print(f"Error updating plots: {e}")
             
+    @QtCore.pyqtSlot()
     def update_status(self):
+        """Update connection state and request system status"""
+        # Check connection status
+        time_since_last = time.time() - self.last_telemetry_time
+        if time_since_last > 2.0:
+            self.connection_status = "Disconnected"
+            
+        # Get system status; the reply arrives in _on_status_response
+        if not self._status_pending:
+            self._status_pending = True
+            self.control_thread.request("status", {"cmd": "get_status"})
+            
+    @QtCore.pyqtSlot(str, list, list)
+    def handle_control_response(self, tag: str, commands: List[Dict[str, Any]],
+                                responses: List[Dict[str, Any]]):
+        """Dispatch control responses from the control thread"""
+        handler = self._control_handlers.get(tag)
+        if handler:
+            handler(commands, responses)
+            
+    def _on_status_response(self, commands: List[Dict[str, Any]], responses: List[Dict[str, Any]]):
         """Update status bar"""
+        self._status_pending = False
         try:
-            # Check connection status
-            time_since_last = time.time() - self.last_telemetry_time
-            if time_since_last > 2.0:
-                self.connection_status = "Disconnected"
-                
-            # Get system status
-            status_response = self.control_client.send_command({"cmd": "get_status"})
+            status_response = responses[0]
             
             if status_response.get("ok", False):
                 freq = status_response.get("loop_frequency", 0)
@@ -396,14 +809,15 @@ class BeamlineConsole(QtWidgets.QMainWindow):
                 if emergency_stop:
                     status_text += " | EMERGENCY STOP ACTIVE"
                     
-                # Update button states
+                # Update button states (restyle only on emergency stop transitions)
                 self.enable_control_btn.setChecked(control_enabled)
-                if emergency_stop:
-                    self.enable_control_btn.setEnabled(False)
-                    self.emergency_stop_btn.setStyleSheet("background-color: #d32f2f; color: white; font-weight: bold;")
-                else:
-                    self.enable_control_btn.setEnabled(True)
-                    self.emergency_stop_btn.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
+                if emergency_stop != self._estop_state:
+                    self._estop_state = emergency_stop
+                    self.enable_control_btn.setEnabled(not emergency_stop)
+                    if emergency_stop:
+                        self.emergency_stop_btn.setStyleSheet("background-color: #d32f2f; color: white; font-weight: bold;")
+                    else:
+                        self.emergency_stop_btn.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
                     
             else:
                 status_text = f"Status: {self.connection_status} | Control communication error"
@@ -413,30 +827,34 @@ class BeamlineConsole(QtWidgets.QMainWindow):
         except Exception as e:
             self.status_label.setText(f"Status: Error - {e}")
             
+    @QtCore.pyqtSlot()
     def apply_settings(self):
         """Apply PID and frequency settings"""
-        try:
+        self.control_thread.request(
+            "apply",
             # Send PID gains
-            pid_response = self.control_client.send_command({
+            {
                 "cmd": "set_pid",
                 "kp": self.kp_spin.value(),
                 "ki": self.ki_spin.value(),
                 "kd": self.kd_spin.value()
-            })
-            
+            },
             # Send frequency
-            freq_response = self.control_client.send_command({
+            {
                 "cmd": "set_freq",
                 "hz": self.freq_spin.value()
-            })
-            
+            },
             # Send setpoint
-            sp_response = self.control_client.send_command({
+            {
                 "cmd": "set_setpoint",
                 "sp": self.setpoint_spin.value()
-            })
-            
-            if not all([pid_response.get("ok"), freq_response.get("ok"), sp_response.get("ok")]):
+            },
+        )
+        
+    def _on_apply_response(self, commands: List[Dict[str, Any]], responses: List[Dict[str, Any]]):
+        """Report the result of apply_settings"""
+        try:
+            if not all(response.get("ok") for response in responses):
                 self.show_error("Failed to apply some settings")
             else:
                 self.show_info("Settings applied successfully")
@@ -444,19 +862,20 @@ class BeamlineConsole(QtWidgets.QMainWindow):
         except Exception as e:
             self.show_error(f"Error applying settings: {e}")
             
+    @QtCore.pyqtSlot()
     def recommission_system(self):
         """Recommission the control system"""
+        self.control_thread.request("recommission", {"cmd": "recommission"})
+        
+    def _on_recommission_response(self, commands: List[Dict[str, Any]], responses: List[Dict[str, Any]]):
+        """Report the result of recommission_system"""
         try:
-            response = self.control_client.send_command({"cmd": "recommission"})
+            response = responses[0]
             
             if response.get("ok", False):
                 self.show_info("System recommissioned successfully")
                 # Clear data
-                self.time_data.clear()
-                self.position_data.clear()
-                self.intensity_data.clear()
-                self.magnet_data.clear()
-                self.loop_time_data.clear()
+                self.clear_data()
                 self.total_deadline_misses = 0
             else:
                 self.show_error(f"Recommission failed: {response.get('error', 'Unknown error')}")
@@ -464,10 +883,15 @@ class BeamlineConsole(QtWidgets.QMainWindow):
         except Exception as e:
             self.show_error(f"Error during recommission: {e}")
             
+    @QtCore.pyqtSlot()
     def emergency_stop(self):
         """Activate emergency stop"""
+        self.control_thread.request("emergency_stop", {"cmd": "emergency_stop"}, urgent=True)
+        
+    def _on_emergency_stop_response(self, commands: List[Dict[str, Any]], responses: List[Dict[str, Any]]):
+        """Report the result of emergency_stop"""
         try:
-            response = self.control_client.send_command({"cmd": "emergency_stop"})
+            response = responses[0]
             
             if response.get("ok", False):
                 self.show_alarm("EMERGENCY STOP ACTIVATED", {})
@@ -477,14 +901,19 @@ class BeamlineConsole(QtWidgets.QMainWindow):
         except Exception as e:
             self.show_error(f"Error activating emergency stop: {e}")
             
+    @QtCore.pyqtSlot()
     def toggle_control(self):
         """Toggle control enable/disable"""
+        self.control_thread.request("toggle_control", {
+            "cmd": "enable_control",
+            "enable": self.enable_control_btn.isChecked()
+        })
+        
+    def _on_toggle_control_response(self, commands: List[Dict[str, Any]], responses: List[Dict[str, Any]]):
+        """Report the result of toggle_control"""
         try:
-            enable = self.enable_control_btn.isChecked()
-            response = self.control_client.send_command({
-                "cmd": "enable_control",
-                "enable": enable
-            })
+            enable = commands[0]["enable"]
+            response = responses[0]
             
             if not response.get("ok", False):
                 self.show_error(f"Failed to toggle control: {response.get('error', 'Unknown error')}")
@@ -508,7 +937,8 @@ class BeamlineConsole(QtWidgets.QMainWindow):
         msg.setIcon(QtWidgets.QMessageBox.Icon.Warning)
         msg.setWindowTitle("System Alarm")
         msg.setText(title)
-        msg.setDetailedText(json.dumps(data, indent=2))
+        if data:
+            msg.setDetailedText(json_dumps_pretty(data))
         msg.exec()
         
     def closeEvent(self, event):
@@ -516,10 +946,15 @@ class BeamlineConsole(QtWidgets.QMainWindow):
         try:
             # Stop telemetry thread
             self.telemetry_thread.stop()
-            self.telemetry_thread.wait(3000)  # Wait up to 3 seconds
+            stopped = self.telemetry_thread.wait(3000)  # Wait up to 3 seconds
             
-            # Close control client
-            self.control_client.close()
+            # Stop control thread (closes the control client)
+            self.control_thread.stop()
+            stopped = self.control_thread.wait(3000) and stopped
+            
+            # Every socket is closed once both threads have exited
+            if stopped:
+                zmq.Context.instance().term()
             
             event.accept()
             
@@ -537,6 +972,12 @@ def main():
     # Set application style
     app.setStyle('Fusion')
     
+    # Global plot options; must be set before any plot is created.
+    # OpenGL line rendering needs PyOpenGL and only covers 1-px pens.
+    pg.setConfigOptions(useOpenGL=importlib.util.find_spec("OpenGL") is not None,
+                        antialias=False, enableExperimental=True,
+                        foreground='k', background='w')
+    
     # Create and show main window
     console = BeamlineConsole()
     console.show()
@@ -9,6 +9,7 @@
 #include "../hw/simple_magnet.hpp"
 #include "../safety/machine_protection_system.hpp"
 #include "../realtime/performance_optimizer.hpp"
+#include "../ipc/telemetry_pub.hpp"
 #include <atomic>
 #include <string>
 #include <sstream>
@@ -25,7 +26,7 @@ using json = nlohmann::json;
  * - 1000 Hz default frequency
  * - PID feedback control with magnet-BPM coupling
  * - Watchdog timing enforcement
- * - JSON telemetry publishing  
+ * - Binary telemetry publishing  
  * - Non-blocking command handling
  */
 struct RTLoop {
@@ -126,11 +127,11 @@ struct RTLoop {
 
       // publish telemetry
       double t = std::chrono::duration<double>(end - t0).count();
-      json j = {{"t",t},{"pos",pos},{"intensity",intensity},
-                {"mag",api.get_magnet()},{"deadline_miss", wd.is_tripped()?1:0},
-                {"mps_safe", mps.is_beam_permitted()},
-                {"mps_abort", mps.is_abort_active()}};
-      pub.send(j.dump());
+      uint8_t flags = 0;
+      if (wd.is_tripped()) flags |= TelemetryPub::FLAG_DEADLINE_MISS;
+      if (mps.is_beam_permitted()) flags |= TelemetryPub::FLAG_MPS_SAFE;
+      if (mps.is_abort_active()) flags |= TelemetryPub::FLAG_MPS_ABORT;
+      pub.send_sample(t, pos, intensity, api.get_magnet(), loop_time_us / 1000.0, flags);
 
       // non-blocking control handling
       zmq_pollitem_t items[] = {{rep.rep, 0, ZMQ_POLLIN, 0}};
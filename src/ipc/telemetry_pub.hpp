@@ -2,17 +2,31 @@
 #include <zmq.h>
 #include <string>
 #include <cstdio>
+#include <cstdint>
+#include <cstring>
 
 /**
  * @brief ZeroMQ telemetry publisher
  * 
- * Publishes telemetry data as JSON messages on "telemetry" topic
- * as specified in technical_details.txt
+ * Publishes telemetry samples on the "telemetry.bin" topic as fixed-size
+ * binary frames (Python struct format '<dddddB'):
+ * t [s], pos, intensity, mag, loop_time_ms, flags
  * 
- * Message format:
- * {"t": <sec>, "pos": <double>, "intensity": <double>, "mag": <double>, "deadline_miss": <0|1>}
+ * flags bit 0: deadline_miss, bit 1: mps_safe, bit 2: mps_abort.
+ * Doubles are sent in host byte order, which is little-endian on all
+ * supported targets.
+ * 
+ * send() still publishes JSON strings on the "telemetry" topic; the
+ * separate topic lets subscribers tell the two formats apart without
+ * inspecting the payload.
  */
 struct TelemetryPub {
+  static constexpr uint8_t FLAG_DEADLINE_MISS = 1u << 0;  ///< Watchdog deadline missed
+  static constexpr uint8_t FLAG_MPS_SAFE = 1u << 1;       ///< MPS permits beam
+  static constexpr uint8_t FLAG_MPS_ABORT = 1u << 2;      ///< MPS abort active
+  static constexpr size_t SAMPLE_SIZE = 5 * sizeof(double) + 1;  ///< Binary frame size (41 bytes)
+  static constexpr const char* SAMPLE_TOPIC = "telemetry.bin";   ///< Topic for binary frames
+  
   void* ctx{nullptr};  ///< ZeroMQ context
   void* pub{nullptr};  ///< ZeroMQ PUB socket
   
@@ -42,4 +56,23 @@ struct TelemetryPub {
     zmq_send(pub, "telemetry", 9, ZMQ_SNDMORE);
     zmq_send(pub, s.data(), s.size(), 0);
   }
+  
+  /**
+   * @brief Send one binary telemetry sample
+   * @param t Time since loop start in seconds
+   * @param pos Beam position
+   * @param intensity Beam intensity
+   * @param mag Magnet current
+   * @param loop_time_ms Loop execution time in milliseconds
+   * @param flags Combination of FLAG_* bits
+   */
+  void send_sample(double t, double pos, double intensity, double mag,
+                   double loop_time_ms, uint8_t flags) {
+    const double values[5] = {t, pos, intensity, mag, loop_time_ms};
+    unsigned char buf[SAMPLE_SIZE];
+    std::memcpy(buf, values, sizeof(values));
+    buf[sizeof(values)] = flags;
+    zmq_send(pub, SAMPLE_TOPIC, std::strlen(SAMPLE_TOPIC), ZMQ_SNDMORE);
+    zmq_send(pub, buf, sizeof(buf), 0);
+  }
 };
\ No newline at end of file
@@ -27,6 +27,10 @@ struct MockPublisher {
     message_count++;
     last_message = msg;
   }
+  
+  void send_sample(double, double, double, double, double, uint8_t) {
+    message_count++;
+  }
 };
 
 // Mock responder for testing  
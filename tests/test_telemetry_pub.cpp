@@ -1,16 +1,15 @@
 #include "../src/ipc/telemetry_pub.hpp"
 #include <iostream>
 #include <cassert>
+#include <cstring>
 #include <thread>
 #include <chrono>
 
 /**
  * @brief Test TelemetryPub functionality
  * 
- * Tests basic publisher creation, message sending, and cleanup
- * Note: This is a unit test that verifies the publisher can be created
- * and send messages without errors. Full integration testing requires
- * a separate subscriber.
+ * Tests basic publisher creation, message sending, and cleanup, and
+ * round-trips one binary sample frame through a local subscriber.
  */
 int main() {
     std::cout << "Testing TelemetryPub functionality..." << std::endl;
@@ -52,6 +51,81 @@ int main() {
         
         std::cout << "  Multiple publisher creation/cleanup test passed" << std::endl;
         
+        // Test binary sample round-trip through a subscriber.
+        // Checked explicitly rather than with assert, which Release builds compile out.
+        {
+            static_assert(TelemetryPub::SAMPLE_SIZE == 41, "binary frame must match '<dddddB'");
+            
+            TelemetryPub pub;
+            void* ctx = zmq_ctx_new();
+            void* sub = zmq_socket(ctx, ZMQ_SUB);
+            if (zmq_connect(sub, "tcp://127.0.0.1:5556") != 0 ||
+                zmq_setsockopt(sub, ZMQ_SUBSCRIBE, TelemetryPub::SAMPLE_TOPIC,
+                               std::strlen(TelemetryPub::SAMPLE_TOPIC)) != 0) {
+                std::cerr << "  Failed to set up subscriber" << std::endl;
+                return 1;
+            }
+            
+            const double sent[5] = {1.234, 0.5, 1000.0, 1.5, 0.12};
+            const uint8_t flags = TelemetryPub::FLAG_MPS_SAFE | TelemetryPub::FLAG_DEADLINE_MISS;
+            
+            // PUB drops frames until the subscription propagates, so resend until one arrives
+            bool received = false;
+            zmq_pollitem_t items[] = {{sub, 0, ZMQ_POLLIN, 0}};
+            for (int attempt = 0; attempt < 50 && !received; attempt++) {
+                pub.send_sample(sent[0], sent[1], sent[2], sent[3], sent[4], flags);
+                received = zmq_poll(items, 1, 100) > 0 && (items[0].revents & ZMQ_POLLIN);
+            }
+            if (!received) {
+                std::cerr << "  No binary frame received" << std::endl;
+                return 1;
+            }
+            
+            char topic[32];
+            int topic_len = zmq_recv(sub, topic, sizeof(topic), 0);
+            if (topic_len != (int)std::strlen(TelemetryPub::SAMPLE_TOPIC) ||
+                std::memcmp(topic, TelemetryPub::SAMPLE_TOPIC, topic_len) != 0) {
+                std::cerr << "  Unexpected topic frame" << std::endl;
+                return 1;
+            }
+            
+            int more = 0;
+            size_t more_size = sizeof(more);
+            zmq_getsockopt(sub, ZMQ_RCVMORE, &more, &more_size);
+            if (more != 1) {
+                std::cerr << "  Topic frame not followed by a payload" << std::endl;
+                return 1;
+            }
+            
+            unsigned char frame[64];
+            int frame_len = zmq_recv(sub, frame, sizeof(frame), 0);
+            if (frame_len != TelemetryPub::SAMPLE_SIZE) {
+                std::cerr << "  Expected " << TelemetryPub::SAMPLE_SIZE
+                          << "-byte frame, got " << frame_len << std::endl;
+                return 1;
+            }
+            
+            double values[5];
+            std::memcpy(values, frame, sizeof(values));
+            for (int i = 0; i < 5; i++) {
+                if (values[i] != sent[i]) {
+                    std::cerr << "  Field " << i << " mismatch: " << values[i]
+                              << " != " << sent[i] << std::endl;
+                    return 1;
+                }
+            }
+            if (frame[40] != flags) {
+                std::cerr << "  Flags mismatch: " << (int)frame[40]
+                          << " != " << (int)flags << std::endl;
+                return 1;
+            }
+            
+            zmq_close(sub);
+            zmq_ctx_term(ctx);
+        }
+        
+        std::cout << "  Binary sample round-trip test passed" << std::endl;
+        
     } catch (const std::exception& e) {
         std::cerr << "Exception: " << e.what() << std::endl;
         return 1;